@@ -1,7 +1,33 @@
 import cv2
+import functools
 import os
+import threading
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
+import torch
 from ultralytics import YOLO
+from ultralytics.utils.plotting import Annotator, colors
+
+
+# 탐지 결과 (class_id: int, class_name: str, confidence: float, bbox: [x1, y1, x2, y2] 원본 좌표)
+Detection = namedtuple('Detection', ['class_id', 'class_name', 'confidence', 'bbox'])
+
+# YOLO 추론 입력 크기 (TensorRT 엔진도 이 크기로 고정 export)
+INFERENCE_SIZE = 640
+
+# 스트리밍 멀티프레임 분석 시 한 번에 추론할 프레임 수
+STREAM_BATCH_SIZE = 4
+
+# torch.compile 워밍업 프레임 크기 (CCTV HLS 16:9, 라이브 640x360 축소 프레임과 같은 letterbox 크기)
+WARMUP_FRAME_SHAPE = (720, 1280, 3)
+
+# 파일 경로 입력 병렬 디코딩 스레드 수
+DECODE_WORKERS = 4
+
+# 분석 결과 이미지 JPEG 저장 옵션
+OUTPUT_JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 90]
 
 
 class VehicleDetector:
@@ -16,15 +42,28 @@ class VehicleDetector:
         # FP16 half-precision support (GPU only)
         self.use_half = (device == 'cuda')
 
+        # 같은 스트림은 입력 크기가 일정하므로 cuDNN 커널 자동 튜닝 결과를 재사용, Ampere 이상은 TF32 사용
+        if device == 'cuda':
+            torch.backends.cudnn.benchmark = True
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.set_float32_matmul_precision('high')
+
+        self.is_engine = False
+
+        # 파일 경로 입력 디코딩용 스레드풀 (호출마다 스레드를 새로 만들지 않도록 유지)
+        self._decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS)
+
+        # 여러 스트림이 하나의 모델을 공유하므로 추론은 직렬화
+        self._predict_lock = threading.Lock()
+
         # Load YOLO model (auto-downloads if not exists)
         self.logger.info(f"Loading YOLO model: {model_path}")
         try:
-            self.model = YOLO(model_path)
+            self.model = self._load_model(model_path)
 
-            # GPU half-precision optimization
-            if self.use_half:
-                self.model.model.half()
-                self.logger.info("Using FP16 half-precision inference")
+            # TensorRT 엔진이 아닌 GPU PyTorch 모델은 torch.compile로 최적화
+            if device == 'cuda' and not self.is_engine:
+                self._compile_model()
 
             self.logger.info("YOLO model loaded successfully")
 
@@ -38,85 +77,360 @@ class VehicleDetector:
             self.logger.error(f"Failed to load YOLO model: {e}")
             raise
 
-    def detect(self, image_source):
+    def _load_model(self, model_path):
         """
-        이미지에서 차량 탐지
+        YOLO 모델 로드
+
+        GPU 사용 시 .pt 옆에 TensorRT FP16 엔진(.engine)을 한 번만 export 해서 캐시하고,
+        이후 실행부터는 캐시된 엔진을 바로 로드한다. .pt가 엔진보다 새로우면 다시 export 하며,
+        TensorRT를 사용할 수 없으면 기존 PyTorch FP16 모델로 폴백한다.
 
         Args:
-            image_source: 이미지 파일 경로(str) 또는 이미지 배열(numpy array)
+            model_path: .pt 또는 .engine 모델 경로
 
         Returns:
-            tuple: (annotated_image, detections)
+            YOLO: 로드된 모델
         """
+        # 이미 export된 엔진을 직접 지정한 경우
+        if model_path.endswith('.engine'):
+            self.is_engine = True
+            self.logger.info("Using TensorRT engine")
+            return YOLO(model_path, task='detect')
+
+        if self.device == 'cuda':
+            engine_path = os.path.splitext(model_path)[0] + '.engine'
+            try:
+                # 엔진이 없거나 .pt가 엔진보다 새로우면(재학습·교체) 다시 export
+                needs_export = not os.path.exists(engine_path) or (
+                    os.path.exists(model_path)
+                    and os.path.getmtime(model_path) > os.path.getmtime(engine_path)
+                )
+                if needs_export:
+                    # FP32 그래프에서 export 해야 레이어 퓨전이 모두 적용된 뒤 FP16으로 변환됨
+                    self.logger.info(f"Exporting TensorRT FP16 engine: {engine_path}")
+                    engine_path = YOLO(model_path).export(
+                        format='engine',
+                        imgsz=INFERENCE_SIZE,
+                        half=True,
+                        dynamic=False,
+                        batch=1,
+                        device=0
+                    )
+
+                model = YOLO(engine_path, task='detect')
+                self.is_engine = True
+                self.logger.info(f"Using TensorRT FP16 engine: {engine_path}")
+                return model
+
+            except Exception as e:
+                self.logger.warning(f"TensorRT unavailable, falling back to PyTorch model: {e}")
+
+        model = YOLO(model_path)
+
+        # GPU half-precision optimization (TensorRT 엔진은 자체적으로 정밀도 처리)
+        if self.use_half:
+            model.model.half()
+            self.logger.info("Using FP16 half-precision inference")
+
+        return model
+
+    def _compile_model(self):
+        """
+        torch.compile(inductor)로 모델 컴파일 및 워밍업
+
+        Ultralytics는 predictor 초기화 시 레이어를 fuse 하면서 모듈을 교체하므로,
+        더미 추론으로 predictor를 먼저 만든 뒤 그 내부 모듈을 컴파일한다.
+        컴파일에 실패하면 컴파일 전 모듈로 되돌린다.
+        """
+        if not hasattr(torch, 'compile'):
+            return
+
+        dummy = np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8)
+        backend = None
         try:
-            # 이미지 읽기
-            if isinstance(image_source, str):
-                frame = cv2.imread(image_source)
-                if frame is None:
-                    self.logger.error(f"이미지 읽기 실패: {image_source}")
-                    return None, []
-            else:
-                # 이미지가 이미 numpy array인 경우 (스트리밍 등)
-                frame = image_source
-
-            # P0 OPTIMIZATION: Input resizing to 640x640
-            # Save original frame size
-            h, w = frame.shape[:2]
-            inference_size = 640
-
-            # Resize maintaining aspect ratio
-            if h > w:
-                new_h = inference_size
-                new_w = int(w * (inference_size / h))
-            else:
-                new_w = inference_size
-                new_h = int(h * (inference_size / w))
+            self._predict(dummy)
+            backend = self.model.predictor.model
+
+            # Detect 헤드는 직전 입력 크기(shape)를 캐시해 anchor 재계산 여부를 정하므로 컴파일 그래프가
+            # 직전 호출 크기에 따라 갈라짐 → 매번 anchor를 계산해 그래프가 현재 입력 크기에만 의존하도록 함
+            detect_head = backend.model.model[-1]
+            if hasattr(detect_head, 'dynamic'):
+                detect_head.dynamic = True
+
+            backend.model = torch.compile(backend.model, mode='reduce-overhead', dynamic=False)
+
+            # .pt 모델은 Ultralytics가 비율 유지 letterbox(16:9 → 384x640)를 쓰고 dynamic=False는
+            # (배치, 높이, 너비)마다 다시 컴파일하므로, 실제로 들어오는 배치 크기(라이브 1장,
+            # 멀티프레임 분석 STREAM_BATCH_SIZE장과 그보다 작은 마지막 배치)를 모두 미리 컴파일
+            for batch_size in range(1, STREAM_BATCH_SIZE + 1):
+                self._predict([dummy] * batch_size)
+            self.logger.info("Using torch.compile optimized model")
+
+        except Exception as e:
+            if backend is not None and hasattr(backend.model, '_orig_mod'):
+                backend.model = backend.model._orig_mod
+            self.logger.warning(f"torch.compile unavailable, using eager model: {e}")
 
-            resized_frame = cv2.resize(frame, (new_w, new_h))
+    def _predict(self, frames):
+        """
+        YOLO 추론 실행
 
-            # Run inference on resized frame
-            results = self.model(
-                resized_frame,
+        Args:
+            frames: 이미지 배열 또는 이미지 배열 리스트 (리스트는 하나의 배치로 처리)
+
+        Returns:
+            list: Ultralytics Results 리스트
+        """
+        with self._predict_lock:
+            return self.model(
+                frames,
                 conf=self.conf_threshold,
                 classes=self.vehicle_classes,
                 device=self.device,
                 verbose=False,
-                imgsz=inference_size,
+                imgsz=INFERENCE_SIZE,
                 half=self.use_half
             )
 
-            # Scale coordinates back to original size
-            detections = []
-            scale_x = w / new_w
-            scale_y = h / new_h
-
-            for result in results:
-                for box in result.boxes:
-                    bbox = box.xyxy[0].tolist()
-                    scaled_bbox = [
-                        bbox[0] * scale_x,
-                        bbox[1] * scale_y,
-                        bbox[2] * scale_x,
-                        bbox[3] * scale_y
-                    ]
-
-                    detections.append({
-                        'class_id': int(box.cls),
-                        'class_name': result.names[int(box.cls)],
-                        'confidence': float(box.conf),
-                        'bbox': scaled_bbox
-                    })
-
-            # Get annotated frame and resize back to original size
-            annotated_resized = results[0].plot()
-            annotated_frame = cv2.resize(annotated_resized, (w, h))
-
-            return annotated_frame, detections
+    @staticmethod
+    def _extract_detections(result):
+        """
+        Results에서 탐지 결과 추출 (좌표는 Ultralytics가 원본 해상도로 복원)
+
+        Args:
+            result: Ultralytics Results (단일 이미지)
+
+        Returns:
+            list: Detection 리스트
+        """
+        # 박스 단위 접근 대신 텐서 전체를 한 번에 CPU로 옮김 (GPU 동기화 1회)
+        boxes = result.boxes
+        bboxes = boxes.xyxy.cpu().numpy().tolist()
+        class_ids = boxes.cls.cpu().numpy().astype(int).tolist()
+        confidences = boxes.conf.cpu().numpy().tolist()
+
+        return [
+            Detection(class_id, result.names[class_id], confidence, bbox)
+            for bbox, class_id, confidence in zip(bboxes, class_ids, confidences)
+        ]
+
+    def _load(self, image_source):
+        """
+        이미지 읽기
+
+        Args:
+            image_source: 이미지 파일 경로(str) 또는 이미지 배열(numpy array)
+
+        Returns:
+            np.ndarray: BGR 프레임 (읽기 실패 시 None)
+        """
+        if isinstance(image_source, str):
+            frame = cv2.imread(image_source)
+            if frame is None:
+                self.logger.error(f"이미지 읽기 실패: {image_source}")
+            return frame
+
+        # 이미지가 이미 numpy array인 경우 (스트리밍 등)
+        return image_source
+
+    def _load_all(self, image_sources):
+        """
+        여러 이미지 읽기 (파일 경로가 있으면 스레드풀에서 병렬 디코딩, cv2.imread는 GIL을 해제)
+
+        Args:
+            image_sources: 이미지 파일 경로 또는 이미지 배열 리스트
+
+        Returns:
+            list: BGR 프레임 리스트 (읽기 실패 항목은 None)
+        """
+        if not any(isinstance(source, str) for source in image_sources):
+            return list(image_sources)
+        return list(self._decode_pool.map(self._load, image_sources))
+
+    def _infer(self, frames):
+        """
+        YOLO 추론 후 프레임별 탐지 결과 반환
+
+        Ultralytics 내부 letterbox가 INFERENCE_SIZE로 리사이즈하고 좌표를 원본 크기로 복원한다.
+
+        Args:
+            frames: BGR 프레임 리스트
+
+        Returns:
+            list: 프레임별 detections 리스트
+        """
+        # batch=1로 고정 export된 TensorRT 엔진은 한 장씩, PyTorch 모델은 한 번에 추론
+        step = 1 if self.is_engine else len(frames)
+        results = []
+        for start in range(0, len(frames), step):
+            results.extend(self._predict(frames[start:start + step]))
+
+        return [self._extract_detections(result) for result in results]
+
+    def detect(self, image_source, draw_boxes=False):
+        """
+        이미지에서 차량 탐지
+
+        Args:
+            image_source: 이미지 파일 경로(str) 또는 이미지 배열(numpy array)
+            draw_boxes: True이면 바운딩 박스를 그린 복사본 반환,
+                False이면 그리지 않고 입력 프레임을 그대로 반환
+
+        Returns:
+            tuple: (annotated_image, detections)
+        """
+        try:
+            frame = self._load(image_source)
+            if frame is None:
+                return None, []
+
+            detections = self._infer([frame])[0]
+
+            # 박스가 필요한 경우에만 원본 해상도 프레임에 직접 그림 (Results.plot() 생략)
+            if not draw_boxes:
+                return frame, detections
+
+            return self.annotate(frame, detections), detections
 
         except Exception as e:
             self.logger.error(f"Detection error: {e}")
             return None, []
 
+    def detect_batch(self, image_sources):
+        """
+        여러 프레임을 하나의 배치로 묶어 한 번의 YOLO 호출로 차량 탐지
+
+        Args:
+            image_sources: 이미지 파일 경로 또는 이미지 배열(numpy array) 리스트
+
+        Returns:
+            list: 프레임별 detections 리스트 (읽기 실패 프레임은 빈 리스트, 탐지 실패 시 빈 리스트)
+        """
+        try:
+            if not image_sources:
+                return []
+
+            frames = self._load_all(image_sources)
+            loaded = [frame for frame in frames if frame is not None]
+            loaded_detections = iter(self._infer(loaded) if loaded else [])
+
+            return [next(loaded_detections) if frame is not None else [] for frame in frames]
+
+        except Exception as e:
+            self.logger.error(f"Batch detection error: {e}")
+            return []
+
+    def annotate(self, frame, detections):
+        """
+        탐지 결과를 원본 해상도 프레임에 그리기 (Results.plot()과 동일한 스타일)
+
+        추론 결과를 보관하지 않고도 나중에 필요한 프레임만 그릴 수 있도록 사용
+
+        Args:
+            frame: 원본 프레임 (numpy array)
+            detections: 탐지 결과 리스트
+
+        Returns:
+            annotated_image: 바운딩 박스가 그려진 이미지 (원본 프레임은 변경하지 않음)
+        """
+        annotator = Annotator(frame.copy(), example=str(self.model.names))
+
+        for det in detections:
+            annotator.box_label(
+                det.bbox,
+                f"{det.class_name} {det.confidence:.2f}",
+                color=colors(det.class_id, True)
+            )
+
+        return annotator.result()
+
+
+@functools.lru_cache(maxsize=4)
+def _text_geometry(h):
+    """
+    이미지 높이에 따른 통계 오버레이 geometry
+
+    Returns:
+        tuple: (font_scale, thickness, padding, line_spacing)
+    """
+    font_scale = max(0.3, h / 2000)  # 최소 0.3, 이미지가 클수록 커짐
+    thickness = max(1, int(h / 1000))
+    padding = int(h * 0.02)  # 이미지 높이의 2%를 패딩으로
+    line_spacing = int(font_scale * 30)
+    return font_scale, thickness, padding, line_spacing
+
+
+@functools.lru_cache(maxsize=256)
+def _text_size(text, font_scale, thickness):
+    """cv2.getTextSize 결과 캐시 (text_width, text_height)"""
+    (text_width, text_height), _ = cv2.getTextSize(
+        text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness
+    )
+    return text_width, text_height
+
+
+@functools.lru_cache(maxsize=32)
+def _render_stats_sprite(stats_text, h):
+    """
+    통계 텍스트를 작은 검은 캔버스에 한 번만 그려둔 스프라이트
+
+    교통량이 천천히 변하는 CCTV에서는 같은 통계가 반복되므로 캐시를 재사용한다.
+
+    Args:
+        stats_text: 줄 단위 통계 텍스트 튜플
+        h: 프레임 높이 (폰트 크기 기준)
+
+    Returns:
+        tuple: (sprite, text_mask) - 텍스트가 그려진 BGR 캔버스와 텍스트 픽셀 마스크
+    """
+    font_scale, thickness, padding, line_spacing = _text_geometry(h)
+
+    # 텍스트 크기 계산 (문자열별로 한 번만 측정)
+    text_sizes = [_text_size(text, font_scale, thickness) for text in stats_text]
+    max_text_width = max(text_width for text_width, _ in text_sizes)
+    total_text_height = sum(text_height + line_spacing for _, text_height in text_sizes)
+
+    box_width = max_text_width + padding * 2
+    box_height = total_text_height + padding
+    sprite = np.zeros((box_height, box_width, 3), dtype=np.uint8)
+
+    # 텍스트 그리기
+    y_offset = padding
+    for text, (_, text_height) in zip(stats_text, text_sizes):
+        cv2.putText(
+            sprite, text, (padding, y_offset + text_height),
+            cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), thickness
+        )
+        y_offset += text_height + line_spacing
+
+    text_mask = sprite.any(axis=2, keepdims=True)
+
+    # 캐시 공유 배열이므로 수정 방지
+    sprite.flags.writeable = False
+    text_mask.flags.writeable = False
+    return sprite, text_mask
+
+
+def _darken_region(frame, x1, y1, x2, y2, alpha):
+    """
+    프레임의 사각형 영역에 반투명 검은 배경을 직접(in-place) 블렌딩
+
+    전체 프레임 복사 + addWeighted 대신 해당 영역만 처리한다.
+
+    Args:
+        frame: 프레임 이미지 (직접 수정됨)
+        x1, y1, x2, y2: 영역 좌표 (cv2.rectangle과 같이 x2, y2 포함)
+        alpha: 검은 배경의 불투명도 (0.0 - 1.0)
+    """
+    h, w = frame.shape[:2]
+    roi = frame[max(0, y1):max(0, min(h, y2 + 1)), max(0, x1):max(0, min(w, x2 + 1))]
+
+    # 영역이 프레임 밖이면 처리할 픽셀 없음 (빈 ROI에 convertScaleAbs는 None 반환)
+    if roi.size == 0:
+        return
+
+    roi[:] = cv2.convertScaleAbs(roi, alpha=1 - alpha)
+
 
 class ImageAnalyzer:
     """이미지 분석 및 결과 처리"""
@@ -132,53 +446,14 @@ class ImageAnalyzer:
         폰트 크기는 이미지 높이의 약 10% 정도
 
         Args:
-            frame: 프레임 이미지
+            frame: 프레임 이미지 (직접 수정됨)
             detections: 탐지 결과 리스트
             avg_vehicle_count: 평균 차량 수 (옵션, 멀티프레임 분석 시 사용)
         """
-        # (기존 내부 로직 유지하되, 라이브 스트리밍용 메소드도 동일한 스타일을 사용하도록 재사용 가능성 고려)
-        # 여기서는 기존 로직 유지
-        if not detections and avg_vehicle_count is None:
-            # 차량이 없어도 "Vehicles: 0" 표시
-            h, w = frame.shape[:2]
-            font_scale = max(0.3, h / 2000)  # 이미지 크기에 따라 폰트 크기 조정
-            thickness = max(1, int(h / 1000))
-
-            text = "Vehicles: 0"
-            (text_width, text_height), baseline = cv2.getTextSize(
-                text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness
-            )
-
-            # 우측하단 위치
-            padding = int(h * 0.02)  # 2% 패딩
-            x = w - text_width - padding
-            y = h - padding
-
-            # 반투명 배경
-            overlay = frame.copy()
-            cv2.rectangle(
-                overlay,
-                (x - padding // 2, y - text_height - padding),
-                (w, h),
-                (0, 0, 0),
-                -1
-            )
-            frame = cv2.addWeighted(overlay, 0.5, frame, 0.5, 0)
-
-            # 텍스트 그리기
-            cv2.putText(
-                frame, text, (x, y - padding // 2),
-                cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), thickness
-            )
-            return frame
-
         # 차량 종류별 카운트
-        vehicle_counts = {}
-        for det in detections:
-            class_name = det['class_name']
-            vehicle_counts[class_name] = vehicle_counts.get(class_name, 0) + 1
+        vehicle_counts = Counter(det.class_name for det in detections)
 
-        # 통계 텍스트 생성
+        # 통계 텍스트 생성 (차량이 없어도 "Vehicles: 0" 표시)
         stats_text = []
 
         # 평균 차량 수가 있으면 최상단에 표시
@@ -191,73 +466,49 @@ class ImageAnalyzer:
         for class_name, count in sorted(vehicle_counts.items()):
             stats_text.append(f"  {class_name}: {count}")  # 들여쓰기로 구분
 
-        # 이미지 크기에 따른 폰트 크기 계산 (약 10%)
+        # 오버레이 스프라이트 (같은 해상도·같은 통계면 캐시 재사용)
         h, w = frame.shape[:2]
-        font_scale = max(0.3, h / 2000)  # 최소 0.3, 이미지가 클수록 커짐
-        thickness = max(1, int(h / 1000))
-
-        # 텍스트 크기 계산
-        max_text_width = 0
-        total_text_height = 0
-        line_spacing = int(font_scale * 30)
-
-        for text in stats_text:
-            (text_width, text_height), baseline = cv2.getTextSize(
-                text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness
-            )
-            max_text_width = max(max_text_width, text_width)
-            total_text_height += text_height + line_spacing
+        sprite, text_mask = _render_stats_sprite(tuple(stats_text), h)
 
         # 우측하단 위치 계산
-        padding = int(h * 0.02)  # 이미지 높이의 2%를 패딩으로
-        box_width = max_text_width + padding * 2
-        box_height = total_text_height + padding
+        padding = _text_geometry(h)[2]
+        box_height, box_width = sprite.shape[:2]
 
         x = w - box_width - padding
         y = h - box_height - padding
 
-        # 반투명 배경 그리기
-        overlay = frame.copy()
-        cv2.rectangle(
-            overlay,
-            (x, y),
-            (x + box_width, y + box_height),
-            (0, 0, 0),
-            -1
+        # 반투명 배경 후 텍스트 픽셀만 한 번에 복사
+        _darken_region(frame, x, y, x + box_width, y + box_height, 0.5)
+        x1, y1 = max(0, x), max(0, y)
+        np.copyto(
+            frame[y1:y + box_height, x1:x + box_width],
+            sprite[y1 - y:, x1 - x:],
+            where=text_mask[y1 - y:, x1 - x:]
         )
-        frame = cv2.addWeighted(overlay, 0.5, frame, 0.5, 0)
-
-        # 텍스트 그리기
-        y_offset = y + padding
-        for text in stats_text:
-            (text_width, text_height), baseline = cv2.getTextSize(
-                text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness
-            )
-            cv2.putText(
-                frame, text, (x + padding, y_offset + text_height),
-                cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), thickness
-            )
-            y_offset += text_height + line_spacing
 
         return frame
 
-    def process_live_frame(self, frame):
+    def process_live_frame(self, frame, detections=None):
         """
         라이브 스트림 프레임 처리 (Detect + Draw)
         
         Args:
             frame: 입력 프레임 (numpy array)
+            detections: 재사용할 탐지 결과 (None이면 새로 추론, 지정 시 추론 없이 다시 그리기만)
             
         Returns:
-            processed_frame: 분석 및 시각화된 프레임
+            tuple: (분석 및 시각화된 프레임, 탐지 결과 리스트)
         """
-        annotated_frame, detections = self.detector.detect(frame)
-        
-        if annotated_frame is None:
-            return frame
+        if detections is None:
+            annotated_frame, detections = self.detector.detect(frame, draw_boxes=True)
+
+            if annotated_frame is None:
+                return frame, []
+        else:
+            annotated_frame = self.detector.annotate(frame, detections)
             
         # 라이브 통계 표시
-        return self.draw_live_stats(annotated_frame, detections)
+        return self.draw_live_stats(annotated_frame, detections), detections
 
     @staticmethod
     def draw_live_stats(frame, detections):
@@ -266,7 +517,7 @@ class ImageAnalyzer:
         좌측 상단에 심플하게 표시
 
         Args:
-            frame: 프레임 이미지
+            frame: 프레임 이미지 (직접 수정됨)
             detections: 탐지 결과 리스트
         
         Returns:
@@ -284,16 +535,8 @@ class ImageAnalyzer:
         x, y = 10, 10
         box_pad = 10
         
-        overlay = frame.copy()
-        cv2.rectangle(
-            overlay, 
-            (x, y), 
-            (x + w + box_pad*2, y + h + box_pad*2), 
-            (0, 0, 0), 
-            -1
-        )
-        # 투명도 적용
-        frame = cv2.addWeighted(overlay, 0.6, frame, 0.4, 0)
+        # 투명도 적용 (박스 영역만 직접 블렌딩)
+        _darken_region(frame, x, y, x + w + box_pad*2, y + h + box_pad*2, 0.6)
         
         cv2.putText(
             frame, 
@@ -323,7 +566,7 @@ class ImageAnalyzer:
         """
         try:
             # 1. YOLO 탐지
-            annotated_frame, detections = self.detector.detect(image_path)
+            annotated_frame, detections = self.detector.detect(image_path, draw_boxes=True)
 
             if annotated_frame is None:
                 self.logger.error("탐지 실패")
@@ -337,7 +580,7 @@ class ImageAnalyzer:
             save_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             save_path = os.path.join(self.output_dir, f"analyzed_{save_timestamp}.jpg")
 
-            cv2.imwrite(save_path, display_frame)
+            cv2.imwrite(save_path, display_frame, OUTPUT_JPEG_PARAMS)
             self.logger.info(f"분석 결과 저장: {save_path}")
 
             return {
@@ -350,12 +593,15 @@ class ImageAnalyzer:
             self.logger.error(f"분석 중 오류: {e}", exc_info=True)
             return {'vehicle_count': 0, 'detections': [], 'saved_image_path': None}
 
-    def analyze_multiple_frames(self, image_paths):
+    def analyze_multiple_frames(self, frames):
         """
         여러 프레임 분석 후 평균 계산 및 결과 저장
 
+        프레임이 도착하는 대로 미니배치 단위로 추론하므로, 캡처 제너레이터를 넘기면
+        캡처와 추론이 겹쳐서 실행된다.
+
         Args:
-            image_paths: 분석할 이미지 경로 리스트
+            frames: 분석할 BGR 프레임(numpy array) 또는 이미지 파일 경로의 리스트/이터러블
 
         Returns:
             dict: {
@@ -365,37 +611,64 @@ class ImageAnalyzer:
             }
         """
         try:
-            if not image_paths:
+            all_detections = []
+            batch = []
+
+            # 중간 프레임 후보만 보관 (프레임 수 n이 늘어도 중간 인덱스 n // 2는 줄지 않음)
+            candidates = deque()
+
+            def run_batch():
+                batch_detections = self.detector.detect_batch(batch)
+                if len(batch_detections) != len(batch):
+                    batch_detections = [[] for _ in batch]
+
+                for detections in batch_detections:
+                    all_detections.append(detections)
+                    self.logger.debug(f"프레임 {len(all_detections)}: {len(detections)}대")
+                batch.clear()
+
+            self.logger.info("프레임 수신과 동시에 YOLO 미니배치 분석 시작...")
+            frame_total = 0
+            for frame in frames:
+                candidates.append((frame_total, frame))
+                frame_total += 1
+                while candidates[0][0] < frame_total // 2:
+                    candidates.popleft()
+
+                batch.append(frame)
+                if len(batch) >= STREAM_BATCH_SIZE:
+                    run_batch()
+
+            if batch:
+                run_batch()
+
+            if not all_detections:
                 self.logger.error("분석할 이미지가 없음")
                 return {'avg_vehicle_count': 0, 'frame_counts': [], 'saved_image_path': None}
 
-            all_detections = []
-            vehicle_counts = []
-
-            # 각 프레임 분석
-            self.logger.info(f"{len(image_paths)}개 프레임 YOLO 분석 시작...")
-            for idx, path in enumerate(image_paths):
-                _, detections = self.detector.detect(path)
-                all_detections.append(detections)
-                vehicle_counts.append(len(detections))
-                self.logger.debug(f"프레임 {idx+1}/{len(image_paths)}: {len(detections)}대")
+            vehicle_counts = [len(detections) for detections in all_detections]
 
             # 평균 계산
             avg_count = sum(vehicle_counts) / len(vehicle_counts) if vehicle_counts else 0
             self.logger.info(f"프레임별 차량 수: {vehicle_counts}, 평균: {avg_count:.1f}대")
 
-            # 중간 프레임 선택하여 저장용 이미지로 사용
-            middle_idx = len(image_paths) // 2
-            middle_frame, middle_detections = self.detector.detect(image_paths[middle_idx])
+            # 중간 프레임의 탐지 결과를 재사용하여 저장용 이미지 생성 (추가 추론 없음)
+            middle_idx = len(all_detections) // 2
+            _, middle_source = candidates[0]
+            middle_detections = all_detections[middle_idx]
+            middle_image = self.detector._load(middle_source)
 
-            if middle_frame is None:
-                self.logger.error("중간 프레임 탐지 실패")
+            # 중간 프레임을 읽지 못해도 이미 계산한 차량 수는 반환
+            if middle_image is None:
+                self.logger.error("중간 프레임 로드 실패, 결과 이미지 저장 생략")
                 return {
                     'avg_vehicle_count': avg_count,
                     'frame_counts': vehicle_counts,
                     'saved_image_path': None
                 }
 
+            middle_frame = self.detector.annotate(middle_image, middle_detections)
+
             # 평균값으로 UI 표시
             display_frame = self._draw_compact_stats(
                 middle_frame,
@@ -408,7 +681,7 @@ class ImageAnalyzer:
             save_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             save_path = os.path.join(self.output_dir, f"analyzed_{save_timestamp}.jpg")
 
-            cv2.imwrite(save_path, display_frame)
+            cv2.imwrite(save_path, display_frame, OUTPUT_JPEG_PARAMS)
             self.logger.info(f"분석 결과 저장: {save_path}")
 
             return {
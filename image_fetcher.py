@@ -1,20 +1,57 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import queue
+import threading
+import time
 import cv2
 
+# PyAV (선택): 키프레임만 디코딩 + GPU(NVDEC) 하드웨어 디코딩용
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    from av.codec.hwaccel import HWAccel  # PyAV 14+
+except ImportError:
+    HWAccel = None
+
+# HTTP 요청 타임아웃 (초)
+HTTP_TIMEOUT = 5
+
+# HLS URL 캐시 유효 시간 (초) - 발급된 URL은 보통 수 분간 유효
+HLS_URL_TTL_SECONDS = 300
+
+# 캡처-추론 파이프라인 설정
+FRAME_QUEUE_SIZE = 8  # 캡처 스레드가 앞서 쌓아둘 수 있는 최대 프레임 수
+DECODE_THREADS = 2  # 디코더가 추론 스레드의 CPU를 잠식하지 않도록 OpenCV 스레드 수 제한
+MAX_CAPTURE_SECONDS = 15  # 사이클당 최대 캡처 길이 (무한루프 방지)
+
+# 디버깅용 원본 프레임 JPEG 저장 옵션 (품질보다 인코딩 속도 우선)
+DUMP_JPEG_PARAMS = [
+    cv2.IMWRITE_JPEG_QUALITY, 85,
+    cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+    cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+]
+
+# 캡처 종료 신호
+_END_OF_STREAM = object()
 
 
 class ImageFetcher:
     """Naver CCTV API에서 HLS 스트림 URL을 가져와 첫 프레임을 캡처하는 클래스"""
 
-    def __init__(self, cctv_id, logger):
+    def __init__(self, cctv_id, logger, hw_decode=False):
         """
         Args:
             cctv_id: CCTV 채널 ID (예: 6301)
             logger: LoggerUtil 인스턴스
+            hw_decode: True이면 PyAV + NVDEC(CUDA)로 HLS 디코딩 (실패 시 OpenCV로 폴백)
         """
         self.cctv_id = cctv_id
         self.logger = logger
+        self.hw_decode = hw_decode
         self.naver_auth_url = "https://nam.veta.naver.com/nac/1"
         self.cctv_api_url = f"https://map.naver.com/p/api/cctv?cctvId={cctv_id}"
         self.headers = {
@@ -22,10 +59,21 @@ class ImageFetcher:
             "Referer": "https://map.naver.com/"
         }
 
+        # 인증/API 호출 간 TCP+TLS 연결 재사용
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+        self.session.mount("https://", adapter)
+
+        # HLS URL 캐시
+        self._cached_hls_url = None
+        self._hls_cached_at = 0
+        self._hls_ttl = HLS_URL_TTL_SECONDS
+
     def _get_cookies(self):
         """Naver 인증 쿠키 획득"""
         try:
-            response = requests.get(self.naver_auth_url)
+            response = self.session.get(self.naver_auth_url, timeout=HTTP_TIMEOUT)
             self.logger.debug(f"쿠키 획득 완료: {len(response.cookies)} 개")
             return response.cookies
         except Exception as e:
@@ -35,10 +83,10 @@ class ImageFetcher:
     def _get_hls_url(self, cookies):
         """CCTV API에서 HLS URL 추출"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 self.cctv_api_url,
                 cookies=cookies,
-                headers=self.headers
+                timeout=HTTP_TIMEOUT
             )
 
             if response.status_code != 200:
@@ -53,6 +101,8 @@ class ImageFetcher:
                     hls_url = cctv.get('hlsUrl')
                     if hls_url:
                         self.logger.debug(f"HLS URL 발견: {hls_url[:50]}...")
+                        self._cached_hls_url = hls_url
+                        self._hls_cached_at = time.time()
                         return hls_url
 
             self.logger.error(f"Channel {self.cctv_id}를 찾을 수 없음")
@@ -62,19 +112,170 @@ class ImageFetcher:
             self.logger.error(f"HLS URL 추출 실패: {e}")
             return None
 
-    def _capture_all_frames_by_duration(self, hls_url, temp_dir):
+    def _get_cached_hls_url(self):
+        """TTL 내의 캐시된 HLS URL 반환 (없거나 만료 시 None)"""
+        if self._cached_hls_url and time.time() - self._hls_cached_at < self._hls_ttl:
+            return self._cached_hls_url
+        return None
+
+    def _invalidate_hls_url(self):
+        """캐시된 HLS URL 폐기 (스트림 열기 실패 시)"""
+        self._cached_hls_url = None
+        self._hls_cached_at = 0
+
+    def get_hls_url(self):
+        """
+        HLS URL 반환 (TTL 내에는 캐시 사용, 만료 시 쿠키 + API 호출로 재발급)
+
+        Returns:
+            str: HLS 스트림 URL (실패 시 None)
+        """
+        hls_url = self._get_cached_hls_url()
+        if hls_url:
+            self.logger.debug("캐시된 HLS URL 사용")
+            return hls_url
+
+        cookies = self._get_cookies()
+        if not cookies:
+            return None
+
+        return self._get_hls_url(cookies)
+
+    def _iter_frames_by_duration(self, hls_url, dump_dir=None):
         """
-        HLS 스트림 영상 길이를 계산하여 1초 간격으로 모든 프레임 캡처
+        HLS 스트림 영상 길이를 계산하여 1초 간격으로 프레임을 읽는 즉시 반환하는 제너레이터
+
+        PyAV가 설치되어 있으면 키프레임만 디코딩하는 PyAV 경로를 먼저 사용하고
+        (hw_decode가 켜져 있으면 NVDEC 사용), PyAV가 없거나 스트림을 열 수 없으면
+        OpenCV VideoCapture로 폴백한다.
+
+        Args:
+            hls_url: HLS 스트림 URL
+            dump_dir: 디버깅용 원본 프레임 저장 디렉토리 (None이면 디스크에 저장하지 않음)
+
+        Yields:
+            np.ndarray: 캡처된 BGR 프레임
+
+        Returns:
+            bool: 스트림 열기 성공 여부
+        """
+        # 디버깅용 덤프 디렉토리 생성
+        if dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+
+        if av is not None:
+            opened = yield from self._iter_frames_pyav(hls_url, dump_dir)
+            if opened:
+                return True
+            self.logger.warning("PyAV 디코딩 실패, OpenCV 디코딩으로 폴백")
+        elif self.hw_decode:
+            self.logger.warning("PyAV를 사용할 수 없어 OpenCV 디코딩 사용")
+
+        return (yield from self._iter_frames_opencv(hls_url, dump_dir))
+
+    def _emit_frame(self, frame, frame_index, dump_dir):
+        """캡처 프레임 로깅 및 디버깅용 덤프"""
+        self.logger.debug(f"프레임 {frame_index} 캡처 ({frame_index}초)")
+
+        if dump_dir:
+            save_path = os.path.join(dump_dir, f"frame_{frame_index}.jpg")
+            cv2.imwrite(save_path, frame, DUMP_JPEG_PARAMS)
+
+    def _iter_frames_pyav(self, hls_url, dump_dir=None):
+        """
+        PyAV로 HLS 스트림의 키프레임만 디코딩하여 약 1초 간격으로 프레임 반환
+
+        비키프레임은 디코더가 건너뛰므로 버릴 프레임을 디코딩하지 않는다.
+        샘플링 간격과 최대 캡처 길이는 프레임의 표시 시각(PTS) 기준이며,
+        hw_decode가 켜져 있으면 NVDEC(CUDA)로 디코딩한다.
 
         Args:
             hls_url: HLS 스트림 URL
-            temp_dir: 저장할 임시 디렉토리
+            dump_dir: 디버깅용 원본 프레임 저장 디렉토리
+
+        Yields:
+            np.ndarray: 캡처된 BGR 프레임
 
         Returns:
-            List[str]: 저장된 프레임 경로 리스트
+            bool: 스트림 열기 성공 여부 (False이면 호출 측에서 폴백)
+        """
+        container = None
+        captured_count = 0
+
+        try:
+            open_options = {'timeout': 10}
+            if self.hw_decode:
+                if HWAccel is not None:
+                    open_options['hwaccel'] = HWAccel(device_type='cuda', allow_software_fallback=True)
+                else:
+                    self.logger.warning("PyAV 하드웨어 가속 미지원 버전, CPU 디코딩 사용")
+
+            self.logger.info(f"HLS 스트림 연결 시도 (PyAV): {hls_url}")
+            try:
+                container = av.open(hls_url, **open_options)
+                stream = container.streams.video[0]
+                stream.codec_context.skip_frame = "NONKEY"
+            except Exception as e:
+                self.logger.warning(f"PyAV 스트림 열기 실패: {e}")
+                return False
+
+            start_time = None
+            elapsed = 0.0
+            last_second = -1
+
+            for av_frame in container.decode(stream):
+                if av_frame.time is None:
+                    continue
+
+                if start_time is None:
+                    start_time = av_frame.time
+                elapsed = av_frame.time - start_time
+
+                # 안전장치: 스트림 시각 기준 최대 15초까지만
+                if elapsed >= MAX_CAPTURE_SECONDS:
+                    self.logger.warning(f"{MAX_CAPTURE_SECONDS}초 제한 도달, 캡처 중단")
+                    break
+
+                # 1초 구간마다 첫 키프레임만 수집 (수집 프레임만 BGR 변환)
+                frame_index = int(elapsed)
+                if frame_index > last_second:
+                    last_second = frame_index
+                    frame = av_frame.to_ndarray(format='bgr24')
+                    captured_count += 1
+                    self._emit_frame(frame, frame_index, dump_dir)
+                    yield frame
+
+            self.logger.info(
+                f"영상 길이: {elapsed:.1f}초 "
+                f"({captured_count}개 프레임 캡처 완료)"
+            )
+
+        except Exception as e:
+            self.logger.error(f"프레임 캡처 중 오류: {e}", exc_info=True)
+
+        finally:
+            if container is not None:
+                container.close()
+                self.logger.debug("PyAV 컨테이너 해제됨")
+
+        return True
+
+    def _iter_frames_opencv(self, hls_url, dump_dir=None):
+        """
+        OpenCV VideoCapture(FFmpeg, CPU 디코딩)로 1초 간격 프레임 반환 (PyAV 미설치 시 폴백)
+
+        Args:
+            hls_url: HLS 스트림 URL
+            dump_dir: 디버깅용 원본 프레임 저장 디렉토리
+
+        Yields:
+            np.ndarray: 캡처된 BGR 프레임
+
+        Returns:
+            bool: 스트림 열기 성공 여부
         """
         cap = None
-        saved_paths = []
+        captured_count = 0
 
         try:
             # Streamlink 의존성 제거: OpenCV가 HLS를 직접 처리하도록 변경
@@ -85,10 +286,7 @@ class ImageFetcher:
 
             if not cap.isOpened():
                 self.logger.error("VideoCapture 열기 실패 (스트림을 찾을 수 없거나 코덱 지원 안됨)")
-                return []
-
-            # temp 디렉토리 생성
-            os.makedirs(temp_dir, exist_ok=True)
+                return False
 
             # FPS 및 영상 길이 계산
             fps = cap.get(cv2.CAP_PROP_FPS)
@@ -107,68 +305,115 @@ class ImageFetcher:
             skip_frames = int(fps * 1.0)  # 1초 간격
 
             while True:
-                ret, frame = cap.read()
-                if not ret or frame is None:
+                # 버릴 프레임은 grab()으로 넘기고 (BGR 변환 생략) 수집할 프레임만 retrieve()
+                if not cap.grab():
                     break
 
-                # 1초마다 프레임 저장
+                # 1초마다 프레임 수집
                 if frame_count % skip_frames == 0:
-                    frame_index = frame_count // skip_frames
-                    save_path = os.path.join(temp_dir, f"frame_{frame_index}.jpg")
-                    success = cv2.imwrite(save_path, frame)
+                    ret, frame = cap.retrieve()
+                    if not ret or frame is None:
+                        break
 
-                    if success:
-                        saved_paths.append(save_path)
-                        self.logger.debug(f"프레임 {frame_index} 저장 ({frame_count // skip_frames}초)")
+                    frame_index = frame_count // skip_frames
+                    captured_count += 1
+                    self._emit_frame(frame, frame_index, dump_dir)
+                    yield frame
 
                 frame_count += 1
 
                 # 안전장치: 최대 15초까지만 (무한루프 방지)
-                if frame_count > fps * 15:
-                    self.logger.warning("15초 제한 도달, 캡처 중단")
+                if frame_count > fps * MAX_CAPTURE_SECONDS:
+                    self.logger.warning(f"{MAX_CAPTURE_SECONDS}초 제한 도달, 캡처 중단")
                     break
 
             duration = frame_count / fps
             self.logger.info(
                 f"영상 길이: {duration:.1f}초 "
-                f"({len(saved_paths)}개 프레임 캡처 완료)"
+                f"({captured_count}개 프레임 캡처 완료)"
             )
 
-            return saved_paths
-
         except Exception as e:
             self.logger.error(f"프레임 캡처 중 오류: {e}", exc_info=True)
-            return []
 
         finally:
             if cap is not None:
                 cap.release()
                 self.logger.debug("VideoCapture 리소스 해제됨")
 
-    def fetch_and_download(self, temp_dir):
+        return True
+
+    def stream_frames(self, dump_dir=None):
         """
-        HLS 스트림에서 영상 길이를 자동 계산하여 1초 간격으로 프레임 샘플링
+        HLS 스트림에서 1초 간격으로 프레임을 샘플링하여 캡처되는 즉시 전달
+
+        캡처(디코딩)는 백그라운드 스레드에서 실행되어 큐에 쌓이고, 호출 측은
+        프레임을 꺼내는 동안 바로 YOLO 추론을 진행할 수 있다.
 
         Args:
-            temp_dir: 프레임을 저장할 임시 디렉토리
+            dump_dir: 디버깅용 원본 프레임 저장 디렉토리 (None이면 메모리에서만 처리)
 
-        Returns:
-            List[str]: 저장된 프레임 경로 리스트 (실패 시 빈 리스트)
+        Yields:
+            np.ndarray: 캡처된 BGR 프레임 (실패 시 아무것도 반환하지 않음)
         """
-        try:
-            # 1. 쿠키 획득
-            cookies = self._get_cookies()
-            if not cookies:
-                return []
-
-            # 2. HLS URL 가져오기
-            hls_url = self._get_hls_url(cookies)
-            if not hls_url:
-                return []
+        # 1~2. HLS URL 가져오기 (TTL 내에는 쿠키/API 호출 생략)
+        from_cache = self._get_cached_hls_url() is not None
+        hls_url = self.get_hls_url()
+        if not hls_url:
+            return
+
+        # 3. 백그라운드 스레드에서 프레임 캡처 (OpenCV 스레드 수는 프로세스 전역 설정)
+        cv2.setNumThreads(DECODE_THREADS)
+        frame_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+        stop_event = threading.Event()
+
+        def put(item):
+            # 소비 측이 중단되면 큐가 가득 찬 상태로 멈추지 않도록 주기적으로 확인
+            while not stop_event.is_set():
+                try:
+                    frame_queue.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def capture():
+            opened = yield from self._iter_frames_by_duration(hls_url, dump_dir)
+            if opened:
+                return
+
+            # 열리지 않는 URL은 캐시에서 폐기하고, 캐시된 URL이었다면 재발급 후 한 번 더 시도
+            self._invalidate_hls_url()
+            if not from_cache:
+                return
+
+            self.logger.warning("캐시된 HLS URL로 스트림 열기 실패, URL 재발급 후 재시도")
+            fresh_url = self.get_hls_url()
+            if fresh_url:
+                opened = yield from self._iter_frames_by_duration(fresh_url, dump_dir)
+                if not opened:
+                    self._invalidate_hls_url()
+
+        def produce():
+            frames = capture()
+            try:
+                for frame in frames:
+                    if not put(frame):
+                        break
+            except Exception as e:
+                self.logger.error(f"프레임 캡처 프로세스 실패: {e}", exc_info=True)
+            finally:
+                frames.close()
+                put(_END_OF_STREAM)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
 
-            # 3. 영상 길이 계산 후 프레임 캡처
-            return self._capture_all_frames_by_duration(hls_url, temp_dir)
-
-        except Exception as e:
-            self.logger.error(f"프레임 캡처 프로세스 실패: {e}", exc_info=True)
-            return []
+        try:
+            while True:
+                frame = frame_queue.get()
+                if frame is _END_OF_STREAM:
+                    break
+                yield frame
+        finally:
+            stop_event.set()
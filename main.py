@@ -1,6 +1,7 @@
 import os
+import asyncio
+import queue
 import threading
-import shutil
 from datetime import datetime
 from dotenv import load_dotenv
 from image_fetcher import ImageFetcher
@@ -11,9 +12,17 @@ from utils.telegram_util import TelegramUtil
 # CCTV 설정 (상수)
 CCTV_ID = 6301  # 수영로
 
+# 분석 워커 종료 신호
+_STOP_WORKER = object()
+
 # 환경변수 로드
 load_dotenv()
 
+def _finish_future(future):
+    """워커 스레드 작업 완료를 이벤트 루프의 future에 반영 (이미 취소된 경우 무시)"""
+    if not future.done():
+        future.set_result(None)
+
 def validate_env_variables():
     """필수 환경변수 체크"""
     required_vars = {
@@ -37,6 +46,8 @@ def validate_env_variables():
         'CONFIDENCE_THRESHOLD': float(required_vars['CONFIDENCE_THRESHOLD']) if required_vars['CONFIDENCE_THRESHOLD'] else 0.0,
         'DEVICE': required_vars['DEVICE'] or 'cpu',
         'INTERVAL_SECONDS': int(required_vars['INTERVAL_SECONDS']) if required_vars['INTERVAL_SECONDS'] else 60,
+        # 선택: 디버깅용 원본 프레임을 temp 폴더에 저장
+        'DEBUG_DUMP_FRAMES': os.getenv('DEBUG_DUMP_FRAMES', 'false').lower() == 'true',
     }
 
 def create_directories():
@@ -52,11 +63,21 @@ class CCTVAnalyzer:
         self.config = config
         self.logger = LoggerUtil().get_logger()
         self.telegram = TelegramUtil()
-        self.timer = None
+        self.stop_event = threading.Event()
+        self._loop = None
+        self._wakeup = None
+
+        # 분석 작업 큐와 상주 워커 스레드
+        self._jobs = queue.Queue()
+        self._worker = None
         self.iteration = 0
 
         # 컴포넌트 초기화
-        self.fetcher = ImageFetcher(config['CCTV_ID'], self.logger)
+        self.fetcher = ImageFetcher(
+            config['CCTV_ID'],
+            self.logger,
+            hw_decode=(config['DEVICE'] == 'cuda')
+        )
         detector = VehicleDetector(
             config['YOLO_MODEL'],
             config['CONFIDENCE_THRESHOLD'],
@@ -71,25 +92,23 @@ class CCTVAnalyzer:
         self.iteration += 1
         self.logger.info(f"\n--- Iteration {self.iteration} ---")
 
-        temp_dir = None
-
         try:
-            # 1. 영상 전체 프레임 캡처 (1초 간격)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            temp_dir = os.path.join('temp', f"batch_{timestamp}")
+            # 1. 영상 전체 프레임 캡처 (1초 간격, 백그라운드 스레드에서 메모리로 처리)
+            dump_dir = None
+            if self.config['DEBUG_DUMP_FRAMES']:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                dump_dir = os.path.join('temp', f"batch_{timestamp}")
 
             self.logger.info("HLS 스트림에서 프레임 캡처 시작...")
-            frame_paths = self.fetcher.fetch_and_download(temp_dir)
+            frames = self.fetcher.stream_frames(dump_dir)
+
+            # 2. 캡처되는 프레임을 바로 멀티프레임 YOLO 분석 (output 폴더에 저장)
+            result = self.analyzer.analyze_multiple_frames(frames)
 
-            if not frame_paths:
+            if not result['frame_counts']:
                 self.logger.error("프레임 캡처 실패")
                 return
 
-            self.logger.info(f"{len(frame_paths)}개 프레임 캡처 완료")
-
-            # 2. 멀티프레임 YOLO 분석 (output 폴더에 저장)
-            result = self.analyzer.analyze_multiple_frames(frame_paths)
-
             self.logger.info(
                 f"분석 완료 - 평균 차량: {result['avg_vehicle_count']:.1f}대 "
                 f"(프레임별: {result['frame_counts']})"
@@ -105,27 +124,69 @@ class CCTVAnalyzer:
             except Exception as telegram_error:
                 self.logger.error(f"텔레그램 전송 실패: {telegram_error}")
 
-        finally:
-            # 3. temp 배치 폴더 전체 삭제
-            if temp_dir and os.path.exists(temp_dir):
+    def _start_worker(self):
+        """
+        분석 작업을 처리할 상주 데몬 워커 스레드 시작 (한 번만)
+
+        기본 스레드풀은 데몬 스레드가 아니어서 Ctrl-C 시 asyncio.run()이 진행 중인 분석이
+        끝날 때까지 종료를 기다리므로, 분석은 프로세스 수명 동안 유지되는 데몬 스레드 하나에서 실행한다.
+        """
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+        self._worker.start()
+
+    def _worker_loop(self):
+        """작업 큐에서 (loop, future, func)를 꺼내 실행하고 이벤트 루프의 future를 완료 (종료 신호 시 종료)"""
+        while True:
+            job = self._jobs.get()
+            if job is _STOP_WORKER:
+                break
+
+            loop, done, func = job
+            try:
+                func()
+            finally:
+                # 중단으로 이벤트 루프가 이미 닫혔으면 알릴 필요 없음
                 try:
-                    shutil.rmtree(temp_dir)
-                    self.logger.debug(f"임시 폴더 삭제: {temp_dir}")
-                except Exception as e:
-                    self.logger.warning(f"임시 폴더 삭제 실패: {e}")
-
-            # 4. 다음 실행 예약
-            self.schedule_next()
-
-    def schedule_next(self):
-        """다음 분석 예약"""
-        self.timer = threading.Timer(
-            self.config['INTERVAL_SECONDS'],
-            self.run_analysis
-        )
-        self.timer.daemon = True
-        self.timer.start()
-        self.logger.info(f"{self.config['INTERVAL_SECONDS']}초 후 다음 분석 예정")
+                    loop.call_soon_threadsafe(_finish_future, done)
+                except RuntimeError:
+                    pass
+
+    async def _run_in_worker(self, func):
+        """func를 워커 스레드에서 실행하고 끝날 때까지 대기"""
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._jobs.put((loop, done, func))
+        await done
+
+    async def _main_loop(self):
+        """
+        INTERVAL_SECONDS 주기로 분석 반복
+
+        분석 시작 시각 기준으로 다음 실행까지 대기하므로 분석 시간만큼 주기가 밀리지 않는다.
+        stop() 호출 시 대기 중이면 바로 종료하고, 분석 중이면 해당 분석이 끝난 뒤 종료한다.
+        """
+        loop = asyncio.get_running_loop()
+        interval = self.config['INTERVAL_SECONDS']
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._start_worker()
+
+        while not self.stop_event.is_set():
+            cycle_start = loop.time()
+            await self._run_in_worker(self.run_analysis)
+
+            if self.stop_event.is_set():
+                break
+
+            # 다음 실행 예약 (stop() 호출 시 대기 중단)
+            delay = max(0.0, interval - (loop.time() - cycle_start))
+            self.logger.info(f"{delay:.1f}초 후 다음 분석 예정")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
 
     def start(self):
         """분석 시작"""
@@ -133,22 +194,22 @@ class CCTVAnalyzer:
         self.logger.info("YOLO CCTV Image Analysis Started")
         self.logger.info("=" * 60)
 
-        # 즉시 첫 분석 실행
-        self.run_analysis()
-
-        # 메인 스레드 유지
+        # 즉시 첫 분석 실행 후 주기적으로 반복
         try:
-            while True:
-                threading.Event().wait(1)
+            asyncio.run(self._main_loop())
         except KeyboardInterrupt:
             self.logger.info("\n사용자에 의해 중단됨")
-            if self.timer:
-                self.timer.cancel()
+            self.stop_event.set()
+            self._jobs.put(_STOP_WORKER)
 
     def stop(self):
-        """분석 중지"""
-        if self.timer:
-            self.timer.cancel()
+        """분석 중지 (다음 분석 예약 취소, 진행 중인 분석이 있으면 끝난 뒤 루프 종료)"""
+        self.stop_event.set()
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+        # 워커는 진행 중인 분석을 마친 뒤 종료
+        self._jobs.put(_STOP_WORKER)
         self.logger.info("=" * 60)
         self.logger.info("Application Stopped")
         self.logger.info("=" * 60)
@@ -3,15 +3,21 @@ from fastapi import FastAPI, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from image_fetcher import ImageFetcher
 from utils.logger_util import LoggerUtil
 from dotenv import load_dotenv
 import os
 import glob
+import queue
 import cv2
+import numpy as np
+import simplejpeg
 import threading
 import time
-from typing import Generator
+import asyncio
+from collections import OrderedDict
+from typing import AsyncGenerator
 from image_analyzer import VehicleDetector, ImageAnalyzer
 
 # 환경변수 로드
@@ -39,6 +45,57 @@ logger = LoggerUtil().get_logger()
 # 스트리머 관리
 streaming_active = False
 
+# 라이브 스트림 최대 가로 해상도 (더 크면 비율 유지하며 축소)
+STREAM_MAX_WIDTH = 640
+
+# 라이브 스트림 열기/읽기 타임아웃 및 열기 재시도
+STREAM_TIMEOUT_MSEC = 5000
+STREAM_OPEN_RETRIES = 3
+STREAM_OPEN_RETRY_DELAY = 1.0
+
+# 라이브 스트림 JPEG 품질
+STREAM_JPEG_QUALITY = 80
+
+# 무압축 PPM 스트리밍 (LAN 디버깅용, 인코딩 비용 대신 대역폭 약 10배 사용)
+RAW_STREAM = os.getenv('RAW_STREAM', 'false').lower() == 'true'
+STREAM_CONTENT_TYPE = b'image/x-portable-pixmap' if RAW_STREAM else b'image/jpeg'
+
+# MJPEG 파트 헤더/끝 (프레임마다 바이트를 이어 붙이지 않고 그대로 전송)
+_HDR = b'--frame\r\nContent-Type: ' + STREAM_CONTENT_TYPE + b'\r\n\r\n'
+_TAIL = b'\r\n'
+
+# 정적 파일(HTML 제외) 브라우저 캐시 시간 (초)
+STATIC_MAX_AGE_SECONDS = 3600
+
+# Detector 워밍업 더미 추론 횟수
+WARMUP_ITERATIONS = 3
+
+# 워밍업 원본 프레임 크기 (일반적인 CCTV HLS 해상도 1280x720)
+WARMUP_SOURCE_SHAPE = (720, 1280, 3)
+
+# GStreamer 하드웨어 디코딩 요소 (예: Jetson "nvv4l2decoder ! nvvidconv", 데스크톱 NVIDIA "nvh264dec")
+# 비어 있으면 OpenCV 기본(FFmpeg) 디코딩 사용
+GST_DECODER = os.getenv('GST_DECODER', '').strip()
+
+# CCTV별 ImageFetcher (HLS URL TTL 캐시 및 HTTP 세션 공유)
+# cctv_id는 요청 파라미터이므로 최근 사용 순(LRU)으로 개수를 제한
+MAX_FETCHERS = 32
+_fetchers = OrderedDict()
+_fetchers_lock = threading.Lock()
+
+def get_fetcher(cctv_id: int) -> ImageFetcher:
+    """CCTV ID별로 공유되는 ImageFetcher 반환 (MAX_FETCHERS 초과 시 가장 오래 사용하지 않은 항목 제거)"""
+    with _fetchers_lock:
+        fetcher = _fetchers.get(cctv_id)
+        if fetcher is None:
+            fetcher = ImageFetcher(cctv_id, logger)
+            _fetchers[cctv_id] = fetcher
+            if len(_fetchers) > MAX_FETCHERS:
+                _fetchers.popitem(last=False)
+        else:
+            _fetchers.move_to_end(cctv_id)
+        return fetcher
+
 def validate_env_variables():
     """필수 환경변수 체크 및 설정 반환"""
     required_vars = {
@@ -55,52 +112,247 @@ def validate_env_variables():
         'YOLO_MODEL': required_vars['YOLO_MODEL'],
         'CONFIDENCE_THRESHOLD': float(required_vars['CONFIDENCE_THRESHOLD']),
         'DEVICE': required_vars['DEVICE'],
+        'INFERENCE_STRIDE': max(1, int(os.getenv('INFERENCE_STRIDE', '3'))),
     }
 
+def downscale_frame(frame):
+    """추론/그리기/인코딩 전에 STREAM_MAX_WIDTH 이하로 축소 (YOLO 입력 크기보다 큰 해상도는 불필요)"""
+    h, w = frame.shape[:2]
+    if w <= STREAM_MAX_WIDTH:
+        return frame
+    return cv2.resize(
+        frame,
+        (STREAM_MAX_WIDTH, round(h * STREAM_MAX_WIDTH / w)),
+        interpolation=cv2.INTER_AREA
+    )
+
+def warmup_analyzer(analyzer):
+    """
+    첫 클라이언트 접속 지연 방지를 위한 더미 추론 (CUDA 초기화, cuDNN 튜닝 등)
+
+    cuDNN benchmark와 torch.compile은 입력 크기별로 튜닝/컴파일하므로,
+    실제 스트림과 같은 축소 경로를 거친 프레임(1280x720 → 640x360)으로 워밍업한다.
+    """
+    try:
+        dummy = downscale_frame(np.zeros(WARMUP_SOURCE_SHAPE, dtype=np.uint8))
+        for _ in range(WARMUP_ITERATIONS):
+            analyzer.process_live_frame(dummy.copy())
+        logger.info(f"Detector 워밍업 완료 ({WARMUP_ITERATIONS}회)")
+    except Exception as e:
+        logger.warning(f"Detector 워밍업 실패: {e}")
+
+@app.on_event("startup")
+def load_model():
+    """서버 시작 시 YOLO 모델을 한 번만 로드하여 모든 스트림이 공유"""
+    app.state.detector = None
+    app.state.analyzer = None
+    app.state.inference_stride = 1
+
+    try:
+        config = validate_env_variables()
+        app.state.inference_stride = config['INFERENCE_STRIDE']
+        app.state.detector = VehicleDetector(
+            config['YOLO_MODEL'],
+            config['CONFIDENCE_THRESHOLD'],
+            [0],  # 2: car, 3: motorcycle, 5: bus, 7: truck
+            config['DEVICE'],
+            logger
+        )
+        # ImageAnalyzer 초기화 (output_dir은 스트리밍에 불필요하므로 None)
+        app.state.analyzer = ImageAnalyzer(app.state.detector, logger, output_dir=None)
+
+    except Exception as e:
+        logger.error(f"Detector 초기화 실패: {e}")
+        return
+
+    warmup_analyzer(app.state.analyzer)
+
 class VideoStreamer:
     """OpenCV 기반 MJPEG 스트리머"""
     
-    def __init__(self, cctv_id: int):
+    def __init__(self, cctv_id: int, analyzer=None, inference_stride: int = 1):
+        """
+        Args:
+            cctv_id: CCTV 채널 ID
+            analyzer: 서버 전역에서 공유하는 ImageAnalyzer (None이면 분석 없이 원본 스트리밍)
+            inference_stride: N 프레임마다 한 번만 YOLO 추론 (나머지는 직전 탐지 결과 재사용)
+        """
         self.cctv_id = cctv_id
         self.logger = LoggerUtil().get_logger()
-        self.detector = None
-        self.analyzer = None
-        
-        # YOLO 모델 초기화
-        try:
-            config = validate_env_variables()
-            self.detector = VehicleDetector(
-                config['YOLO_MODEL'],
-                config['CONFIDENCE_THRESHOLD'],
-                [0],  # 2: car, 3: motorcycle, 5: bus, 7: truck
-                config['DEVICE'],
-                self.logger
-            )
-            # ImageAnalyzer 초기화 (output_dir은 스트리밍에 불필요하므로 None)
-            self.analyzer = ImageAnalyzer(self.detector, self.logger, output_dir=None)
-            
-        except Exception as e:
-            self.logger.error(f"Detector 초기화 실패: {e}")
+        self.analyzer = analyzer
+        self.inference_stride = inference_stride
+
+        # 프레임 간 탐지 결과 재사용 상태
+        self._frame_count = 0
+        self._last_detections = []
+
+        # 백그라운드 추론 워커 (1칸 큐: 최신 프레임/결과만 유지)
+        self._infer_queue = queue.Queue(maxsize=1)
+        self._result_queue = queue.Queue(maxsize=1)
+        self._stop_event = threading.Event()
+        self._worker = None
 
     def get_stream_url(self):
-        """HLS URL 획득"""
-        fetcher = ImageFetcher(self.cctv_id, self.logger)
-        cookies = fetcher._get_cookies()
-        if not cookies:
-            return None
-        return fetcher._get_hls_url(cookies)
+        """HLS URL 획득 (CCTV별 공유 fetcher의 TTL 캐시 사용, 재연결 시 HTTP 재요청 생략)"""
+        return get_fetcher(self.cctv_id).get_hls_url()
+
+    def invalidate_stream_url(self):
+        """캐시된 HLS URL 폐기 (스트림 열기 실패 시 다음 연결에서 재발급)"""
+        get_fetcher(self.cctv_id)._invalidate_hls_url()
+
+    def _open_capture(self, hls_url):
+        """
+        HLS 스트림 열기 (블로킹)
+
+        GST_DECODER가 설정되어 있으면 GStreamer 하드웨어 디코딩 파이프라인을 먼저 시도하고,
+        실패하면 기존 URL 방식(FFmpeg)으로 폴백
+
+        Args:
+            hls_url: HLS 스트림 URL
+
+        Returns:
+            cv2.VideoCapture: 캡처 객체 (재시도 후에도 실패하면 열리지 않은 객체)
+        """
+        if GST_DECODER:
+            pipeline = (
+                f'souphttpsrc location="{hls_url}" ! hlsdemux ! tsdemux ! h264parse ! '
+                f'{GST_DECODER} ! videoconvert ! video/x-raw,format=BGR ! '
+                'appsink drop=true max-buffers=1 sync=false'
+            )
+            cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+            if cap.isOpened():
+                return cap
+
+            cap.release()
+            self.logger.warning(f"GStreamer 파이프라인 열기 실패, 기본 디코딩으로 폴백 (GST_DECODER={GST_DECODER})")
+
+        # 열기/읽기 타임아웃은 열 때 지정해야 적용됨, 실패 시 짧게 재시도
+        for attempt in range(1, STREAM_OPEN_RETRIES + 1):
+            cap = cv2.VideoCapture(hls_url, cv2.CAP_FFMPEG, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, STREAM_TIMEOUT_MSEC,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, STREAM_TIMEOUT_MSEC,
+            ])
+            # FFmpeg 백엔드는 CAP_PROP_BUFFERSIZE를 지원하지 않으므로 버퍼 제한은 GStreamer appsink에서만 적용
+            if cap.isOpened():
+                return cap
+
+            cap.release()
+            self.logger.warning(f"비디오 스트림 열기 실패 ({attempt}/{STREAM_OPEN_RETRIES})")
+            if attempt < STREAM_OPEN_RETRIES:
+                time.sleep(STREAM_OPEN_RETRY_DELAY)
+
+        return cap
+
+    @staticmethod
+    def _read_frame(cap, next_frame_time):
+        """
+        다음 전송 시각까지 스트림을 grab()으로 넘긴 뒤 한 프레임만 retrieve() (블로킹)
+
+        Returns:
+            frame: STREAM_MAX_WIDTH 이하로 축소된 BGR 프레임 (스트림 읽기 실패 시 None)
+        """
+        while True:
+            # 스트림 포인터만 전진 (BGR 변환은 실제 전송할 프레임만)
+            if not cap.grab():
+                return None
+
+            # FPS 제한
+            if time.time() < next_frame_time:
+                continue
+
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
+
+            return downscale_frame(frame)
+
+    def _inference_worker(self):
+        """추론 워커: 최신 프레임을 받아 탐지하고 최신 결과만 남김 (JPEG 전송 속도와 분리)"""
+        while not self._stop_event.is_set():
+            try:
+                frame = self._infer_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                _, detections = self.analyzer.detector.detect(frame)
+            except Exception as e:
+                self.logger.error(f"추론 워커 오류: {e}")
+                continue
+
+            # 이전 결과가 아직 소비되지 않았으면 버리고 최신 결과로 교체
+            try:
+                self._result_queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._result_queue.put_nowait(detections)
+
+    def _start_worker(self):
+        """추론 워커 스레드 시작"""
+        if not self.analyzer or self._worker:
+            return
+        self._worker = threading.Thread(target=self._inference_worker, daemon=True)
+        self._worker.start()
+
+    def _stop_worker(self):
+        """추론 워커 스레드 종료 요청 (진행 중인 추론이 끝나면 스스로 종료, 이벤트 루프는 대기하지 않음)"""
+        self._stop_event.set()
+        self._worker = None
+
+    def _encode_frame(self, frame):
+        """
+        최신 탐지 결과 그리기 후 JPEG 인코딩 (블로킹)
+
+        Returns:
+            bytes: JPEG 바이트 (RAW_STREAM이면 PPM 바이트)
+        """
+        if self.analyzer:
+            # INFERENCE_STRIDE 프레임마다 워커에 추론 요청 (워커가 바쁘면 버림)
+            if self._frame_count % self.inference_stride == 0:
+                try:
+                    self._infer_queue.put_nowait(frame)
+                except queue.Full:
+                    pass
+            self._frame_count += 1
+
+            # 새 탐지 결과가 있으면 교체, 없으면 직전 결과를 다시 그림
+            try:
+                self._last_detections = self._result_queue.get_nowait()
+            except queue.Empty:
+                pass
 
-    def generate_frames(self) -> Generator[bytes, None, None]:
-        """프레임 생성 및 분석 (Generator)"""
-        hls_url = self.get_stream_url()
+            frame, _ = self.analyzer.process_live_frame(frame, self._last_detections)
+
+        # 무압축 PPM (P6 헤더 + RGB 바이트)
+        if RAW_STREAM:
+            h, w = frame.shape[:2]
+            header = b'P6\n%d %d\n255\n' % (w, h)
+            return header + cv2.cvtColor(frame, cv2.COLOR_BGR2RGB).tobytes()
+
+        # JPEG 인코딩 (libjpeg-turbo, 실패 시 예외 발생)
+        return simplejpeg.encode_jpeg(
+            np.ascontiguousarray(frame),
+            quality=STREAM_JPEG_QUALITY,
+            colorspace='BGR',
+            fastdct=True
+        )
+
+    async def generate_frames(self) -> AsyncGenerator[bytes, None]:
+        """
+        프레임 생성 및 분석 (Async Generator)
+
+        블로킹되는 OpenCV 호출만 스레드풀에서 실행하고, MJPEG 청크는 이벤트 루프에서 바로 전송
+        """
+        hls_url = await run_in_threadpool(self.get_stream_url)
         if not hls_url:
             self.logger.error("HLS URL을 가져올 수 없습니다.")
             return
 
-        cap = cv2.VideoCapture(hls_url)
+        cap = await run_in_threadpool(self._open_capture, hls_url)
         
         if not cap.isOpened():
             self.logger.error("비디오 스트림을 열 수 없습니다.")
+            self.invalidate_stream_url()
             return
 
         # FPS 제어
@@ -108,42 +360,33 @@ class VideoStreamer:
         frame_interval = 1.0 / target_fps
         last_frame_time = 0
 
+        self._start_worker()
+
         try:
             while True:
-                current_time = time.time()
-                
-                # 프레임 읽기
-                ret, frame = cap.read()
-                if not ret:
+                frame = await run_in_threadpool(self._read_frame, cap, last_frame_time + frame_interval)
+                if frame is None:
                     self.logger.warning("프레임 읽기 실패, 재연결 시도...")
                     cap.release()
-                    time.sleep(0.5)
-                    cap = cv2.VideoCapture(hls_url)
-                    continue
-
-                # FPS 제한
-                if current_time - last_frame_time < frame_interval:
+                    await asyncio.sleep(0.5)
+                    hls_url = await run_in_threadpool(self.get_stream_url) or hls_url
+                    cap = await run_in_threadpool(self._open_capture, hls_url)
+                    if not cap.isOpened():
+                        self.invalidate_stream_url()
                     continue
-                last_frame_time = current_time
-
-                # YOLO 분석 및 그리기
-                if self.analyzer:
-                    frame = self.analyzer.process_live_frame(frame)
+                last_frame_time = time.time()
 
-                # JPEG 인코딩
-                ret, buffer = cv2.imencode('.jpg', frame)
-                if not ret:
-                    continue
-                
-                frame_bytes = buffer.tobytes()
+                frame_bytes = await run_in_threadpool(self._encode_frame, frame)
                 
-                # MJPEG 포맷으로 전송
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                # MJPEG 포맷으로 전송 (헤더/본문/끝을 복사 없이 차례로 전송)
+                yield _HDR
+                yield frame_bytes
+                yield _TAIL
 
         except Exception as e:
             self.logger.error(f"스트리밍 중 오류: {e}")
         finally:
+            self._stop_worker()
             if cap:
                 cap.release()
             self.logger.info("스트리밍 종료")
@@ -152,7 +395,7 @@ class VideoStreamer:
 @app.get("/api/video_feed")
 async def video_feed(cctv_id: int):
     """실시간 분석 영상 스트리밍 엔드포인트"""
-    streamer = VideoStreamer(cctv_id)
+    streamer = VideoStreamer(cctv_id, app.state.analyzer, app.state.inference_stride)
     return StreamingResponse(
         streamer.generate_frames(),
         media_type="multipart/x-mixed-replace; boundary=frame"
@@ -181,17 +424,24 @@ async def get_hls_url(cctv_id: int = Query(..., description="CCTV ID (예: 6301,
     try:
         logger.info(f"HLS URL 요청 - CCTV ID: {cctv_id}")
 
-        # ImageFetcher로 HLS URL 획득
-        fetcher = ImageFetcher(cctv_id, logger)
-        
-        # 쿠키 획득
-        cookies = fetcher._get_cookies()
+        # ImageFetcher로 HLS URL 획득 (TTL 내에는 캐시된 URL 반환)
+        fetcher = get_fetcher(cctv_id)
+        hls_url = fetcher._get_cached_hls_url()
+        if hls_url:
+            return {
+                "success": True,
+                "hls_url": hls_url,
+                "cctv_id": cctv_id
+            }
+
+        # 쿠키 획득 (블로킹 HTTP 호출은 스레드풀에서 실행하여 이벤트 루프 유지)
+        cookies = await run_in_threadpool(fetcher._get_cookies)
         if not cookies:
             logger.error("네이버 인증 쿠키 획득 실패")
             raise HTTPException(status_code=503, detail="네이버 인증 서버 오류")
 
         # HLS URL 추출
-        hls_url = fetcher._get_hls_url(cookies)
+        hls_url = await run_in_threadpool(fetcher._get_hls_url, cookies)
         if not hls_url:
             raise HTTPException(status_code=404, detail="CCTV 스트림을 찾을 수 없습니다")
 
@@ -207,12 +457,29 @@ async def get_hls_url(cctv_id: int = Query(..., description="CCTV ID (예: 6301,
         logger.error(f"오류 발생: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+class CachedStatic(StaticFiles):
+    """
+    Cache-Control 헤더를 추가한 정적 파일 서빙
+
+    파일명에 해시가 없으므로 immutable 대신, HTML은 매번 ETag로 재검증(304)하고
+    나머지 정적 파일은 짧게 캐시한다.
+    """
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if path.endswith('.html'):
+            response.headers['Cache-Control'] = 'no-cache'
+        else:
+            response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE_SECONDS}'
+        return response
+
 @app.get("/")
 async def root():
-    return FileResponse("static/index.html")
+    # ETag/Last-Modified는 FileResponse가 설정, 브라우저가 매번 재검증하도록 no-cache
+    return FileResponse("static/index.html", headers={'Cache-Control': 'no-cache'})
 
 # 정적 파일 마운트
-app.mount("/static", StaticFiles(directory="./static"), name="static")
+app.mount("/static", CachedStatic(directory="./static"), name="static")
 if __name__ == "__main__":
     import uvicorn
     # 서버 시작 전 환경변수 체크
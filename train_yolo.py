@@ -10,6 +10,9 @@ BATCH_SIZE = 4
 DEVICE = "cpu"  # "cpu" or "0"
 RUN_NAME = "yolo11n_v5"
 PROJECT = "runs_v5"
+# TensorRT 엔진 export (GPU 훈련 시에만)
+EXPORT_IMG_SIZE = 640  # image_analyzer.INFERENCE_SIZE와 동일해야 함 (정적 엔진)
+EXPORT_INT8 = False    # True: 학습 데이터로 INT8 캘리브레이션, False: FP16
 # =========================================================
 
 def check_data_yaml():
@@ -32,5 +35,33 @@ def main():
         name=RUN_NAME,
     )
 
+    export_engine(model.trainer.best)
+
+def export_engine(weights_path):
+    """
+    학습된 best.pt를 TensorRT 엔진(.engine)으로 export
+
+    VehicleDetector는 배치 1, 고정 입력 크기의 엔진을 사용하므로 같은 조건으로 export하며,
+    생성된 .engine 경로를 YOLO_MODEL에 지정하면 바로 사용할 수 있다.
+
+    Args:
+        weights_path: 학습된 .pt 가중치 경로
+    """
+    if DEVICE == "cpu":
+        print("DEVICE=cpu: TensorRT export skipped")
+        return
+
+    engine_path = YOLO(weights_path).export(
+        format="engine",
+        imgsz=EXPORT_IMG_SIZE,
+        half=not EXPORT_INT8,
+        int8=EXPORT_INT8,
+        data=DATA_YAML if EXPORT_INT8 else None,
+        dynamic=False,
+        batch=1,
+        device=0 if DEVICE == "cuda" else DEVICE,
+    )
+    print(f"TensorRT engine exported: {engine_path}")
+
 if __name__ == "__main__":
     main()
@@ -1,11 +1,14 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
-from datetime import datetime
 import os
 
 class LoggerUtil:
     _instance = None
     _initialized = False
+    _listener = None  # 파일/콘솔 출력을 담당하는 백그라운드 리스너 (프로세스 수명 동안 유지)
 
     def __new__(cls):
         if cls._instance is None:
@@ -24,8 +27,8 @@ class LoggerUtil:
             # 디렉토리가 없으면 생성
             log_dir.mkdir(parents=True, exist_ok=True)
 
-            # 로그 파일 설정
-            log_file = log_dir / f"{datetime.now().strftime('%Y-%m-%d')}_log.log"
+            # 로그 파일 설정 (자정마다 app.log.YYYY-MM-DD로 교체, 14일치 보관)
+            log_file = log_dir / 'app.log'
 
             # 로거 생성
             self.logger = logging.getLogger('MQLogger')
@@ -36,7 +39,7 @@ class LoggerUtil:
                 self.logger.handlers.clear()
 
             # 파일 핸들러
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler = TimedRotatingFileHandler(log_file, when='midnight', backupCount=14, encoding='utf-8')
             file_handler.setLevel(logging.INFO)
 
             # 콘솔 핸들러
@@ -48,9 +51,15 @@ class LoggerUtil:
             file_handler.setFormatter(formatter)
             console_handler.setFormatter(formatter)
 
-            # 핸들러 추가
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(console_handler)
+            # 로깅 호출은 큐에 넣기만 하고, 실제 파일/콘솔 쓰기는 리스너 스레드에서 처리
+            log_queue = queue.Queue(-1)
+            self.logger.addHandler(QueueHandler(log_queue))
+
+            LoggerUtil._listener = QueueListener(log_queue, file_handler, console_handler)
+            LoggerUtil._listener.start()
+
+            # 종료 시 큐에 남은 로그까지 기록
+            atexit.register(LoggerUtil._listener.stop)
             
             LoggerUtil._initialized = True
 
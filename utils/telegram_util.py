@@ -1,22 +1,45 @@
 import os
-from urllib.request import urlopen
-import urllib.parse
 import requests
 from dotenv import load_dotenv
 import json
 
 load_dotenv()
 
+# 텔레그램 API 요청 타임아웃 (초)
+TELEGRAM_TIMEOUT = 5
+
 class TelegramUtil:
     def __init__(self):
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.chat_id = os.getenv('TELEGRAM_CHAT_ID')
         self.chat_test_id = os.getenv('TELEGRAM_CHAT_TEST_ID')
 
+        # keep-alive 세션 재사용 (메시지마다 TCP/TLS 핸드셰이크 방지)
+        self.session = requests.Session()
+
+    @staticmethod
+    def _check_response(response):
+        """
+        잘못된 토큰, HTML 파싱 오류 등 실패 응답은 예외로 전달 (호출 측에서 로깅)
+
+        raise_for_status()의 메시지에는 봇 토큰이 포함된 URL이 들어가므로 사용하지 않음
+        """
+        if response.ok:
+            return
+        try:
+            description = response.json().get('description', '')
+        except ValueError:
+            description = response.reason
+        raise RuntimeError(f"Telegram API error {response.status_code}: {description}")
+
     def send_message(self, message):
         """일반 메시지 전송"""
-        message = urllib.parse.quote_plus(message)
-        urlopen(f"https://api.telegram.org/bot{self.bot_token}/sendMessage?chat_id={self.chat_id}&parse_mode=html&text={message}")
+        response = self.session.post(
+            f"https://api.telegram.org/bot{self.bot_token}/sendMessage",
+            data={'chat_id': self.chat_id, 'parse_mode': 'html', 'text': message},
+            timeout=TELEGRAM_TIMEOUT
+        )
+        self._check_response(response)
 
     def send_photo(self, photo_path, caption=""):
         """이미지 전송"""
@@ -31,50 +54,49 @@ class TelegramUtil:
             files = {
                 "photo": photo
             }
-            response = requests.post(url, data=payload, files=files)
+            response = self.session.post(url, data=payload, files=files, timeout=TELEGRAM_TIMEOUT)
         
         return response.json()
 
     def send_test_message(self, message):
         """테스트용 채팅방으로 메시지 전송"""
-        message = urllib.parse.quote_plus(message)
-        urlopen(f"https://api.telegram.org/bot{self.bot_token}/sendMessage?chat_id={self.chat_test_id}&parse_mode=html&text={message}") 
+        response = self.session.post(
+            f"https://api.telegram.org/bot{self.bot_token}/sendMessage",
+            data={'chat_id': self.chat_test_id, 'parse_mode': 'html', 'text': message},
+            timeout=TELEGRAM_TIMEOUT
+        )
+        self._check_response(response)
     
-    def send_multiple_photo(self, photo_paths, caption=""):
-        """여러 장의 이미지 한 번에 전송"""
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMediaGroup"
-        
-        media = []
-        files = {}
-        
-        # 각 이미지에 대한 미디어 객체 생성
-        for index, photo_path in enumerate(photo_paths):
-            # 첫 번째 이미지에만 캡션 추가
-            media_caption = caption if index == 0 else ""
-            
-            media.append({
+    def _media_group(self, photo_count, caption=""):
+        """sendMediaGroup용 미디어 목록 생성 (첫 번째 이미지에만 캡션 추가)"""
+        return [
+            {
                 'type': 'photo',
                 'media': f'attach://photo{index}',
-                'caption': media_caption,
+                'caption': caption if index == 0 else "",
                 'parse_mode': 'html'
-            })
-            
-            files[f'photo{index}'] = open(photo_path, 'rb')
-        
-        try:
-            payload = {
-                'chat_id': self.chat_id,
-                'media': json.dumps(media)
             }
-            
-            response = requests.post(url, data=payload, files=files)
-            for file in files.values():
-                file.close()
-            
-            return response.json()
-            
-        except Exception as e:
-            # 에러 발생시에도 파일들을 확실히 닫아줌
-            for file in files.values():
-                file.close()
-            raise e 
\ No newline at end of file
+            for index in range(photo_count)
+        ]
+
+    @staticmethod
+    def _read_photo(photo_path):
+        """이미지 파일을 (파일명, 바이트)로 읽기"""
+        with open(photo_path, 'rb') as photo:
+            return os.path.basename(photo_path), photo.read()
+
+    def send_multiple_photo(self, photo_paths, caption=""):
+        """여러 장의 이미지 한 번에 전송"""
+        url = f"https://api.telegram.org/bot{self.bot_token}/sendMediaGroup"
+
+        # 각 이미지를 읽어 첨부 (첫 번째 이미지에만 캡션 추가)
+        photos = [self._read_photo(photo_path) for photo_path in photo_paths]
+        files = {f'photo{index}': photo for index, photo in enumerate(photos)}
+
+        payload = {
+            'chat_id': self.chat_id,
+            'media': json.dumps(self._media_group(len(photos), caption))
+        }
+
+        response = self.session.post(url, data=payload, files=files, timeout=TELEGRAM_TIMEOUT)
+        return response.json()